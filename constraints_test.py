@@ -1,7 +1,12 @@
+import os
+import tempfile
 import unittest
 from datetime import datetime, timedelta
-from models import Problem, Vessel, Crane, CraneType, Shift, ProductivityMode, ForbiddenZone, Berth
-from solver import solve, Solution
+from unittest import mock
+import numpy as np
+import visualization
+from models import Problem, Vessel, Crane, CraneType, Shift, ProductivityMode, ForbiddenZone, Berth, VesselSolution
+from solver import solve, Solution, greedy_assign, _window_min
 
 class TestSolverConstraints(unittest.TestCase):
     
@@ -289,6 +294,99 @@ class TestSolverConstraints(unittest.TestCase):
         sol_v1 = solution.vessel_solutions[0]
         self.assertLessEqual(sol_v1.berth_position + v1.loa, short_crane.berth_range_end)
 
+    def test_solver_parameters_override(self):
+        """Test: solver_parameters overrides are applied on top of the tuned defaults."""
+        v1 = Vessel("V1", 20, 100, 10, self.start_date, self.start_date + timedelta(hours=48))
+
+        problem = self.create_problem([v1])
+        self._preprocess_vessels(problem)
+        solution = solve(problem, time_limit_seconds=5,
+                         solver_parameters={"num_workers": 1, "linearization_level": 0})
+
+        self.assertEqual(solution.status, "OPTIMAL")
+
+        # An unknown parameter name must not be silently ignored.
+        with self.assertRaises(AttributeError):
+            solve(problem, time_limit_seconds=5, solver_parameters={"not_a_parameter": 1})
+
+    def test_berth_depths_match_depth_at(self):
+        """Cached per-meter depth array agrees with get_depth_at and tracks depth_map edits."""
+        berth = Berth(length=300, depth_map={100: 12.0, 0: 16.0, 250: 9.5})
+        self.assertEqual(list(berth.get_depths()), [berth.get_depth_at(p) for p in range(300)])
+
+        berth.depth_map[200] = 11.0
+        self.assertEqual(berth.get_depths()[220], 11.0)
+
+    def test_symmetry_breaking_keeps_optimum(self):
+        """Test: Ordering identical cranes does not change the optimal objective."""
+        # Two interchangeable MHC cranes, so the symmetry-breaking constraints apply.
+        self.cranes = [
+            Crane("M1", "MHC-1", CraneType.MHC, 0, 1000, 10, 20),
+            Crane("M2", "MHC-2", CraneType.MHC, 0, 1000, 10, 20),
+        ]
+        v1 = Vessel("V1", 60, 200, 10, self.start_date, self.start_date + timedelta(hours=48))
+        v2 = Vessel("V2", 30, 200, 10, self.start_date, self.start_date + timedelta(hours=48))
+        problem = self.create_problem([v1, v2])
+        self._preprocess_vessels(problem)
+
+        symmetrized = solve(problem, time_limit_seconds=20)
+        # No identical groups: neither the ordering constraints nor the hint relabelling
+        with mock.patch("solver._identical_crane_groups", return_value=[]):
+            unsymmetrized = solve(problem, time_limit_seconds=20)
+
+        self.assertEqual(unsymmetrized.status, "OPTIMAL")
+        self.assertEqual(symmetrized.status, "OPTIMAL")
+        self.assertEqual(symmetrized.objective_value, unsymmetrized.objective_value)
+
+    def test_greedy_assign_respects_reach_depth_and_availability(self):
+        """Test: The greedy warm start only uses reachable, available cranes at deep-enough positions."""
+        # Water is only deep enough for a 10m draft from 500m on.
+        self.cranes = [
+            Crane("C1", "ShortCrane", CraneType.STS, 0, 600, 10, 20),   # cannot cover any deep position
+            Crane("C2", "STS-2", CraneType.STS, 0, 1000, 10, 20),
+            Crane("C3", "STS-3", CraneType.STS, 0, 1000, 10, 20),       # down in shifts 0-1
+        ]
+        v1 = Vessel("V1", 60, 200, 10, self.start_date, self.start_date + timedelta(hours=60))
+        problem = self.create_problem([v1])
+        problem.berth = Berth(length=1000, depth_map={0: 8.0, 500: 20.0})
+        for t in (0, 1):
+            problem.crane_availability_per_shift[t] = ["C1", "C2"]
+        self._preprocess_vessels(problem)
+
+        gap = 40
+        depths = problem.berth.get_depths()
+        valid = [p for p in range(gap, 1000 - v1.loa - gap + 1) if depths[p:p + v1.loa].min() >= v1.draft]
+        pos, start, end, moves = greedy_assign(problem, {0: valid}, gap)
+
+        self.assertIn(pos[0], valid)
+        self.assertGreaterEqual(depths[pos[0]:pos[0] + v1.loa].min(), v1.draft)
+        self.assertEqual(sum(moves.values()), v1.workload)
+        crane_by_id = {c.id: c for c in problem.cranes}
+        for (c_id, i, t), m in moves.items():
+            c = crane_by_id[c_id]
+            self.assertTrue(c.berth_range_start <= pos[i] and pos[i] + v1.loa <= c.berth_range_end,
+                            f"{c_id} does not reach V1 at {pos[i]}")
+            self.assertIn(c_id, problem.crane_availability_per_shift[t], f"{c_id} is down in shift {t}")
+            self.assertTrue(start[i] <= t < end[i])
+
+        # The hint may only speed the search up, not change the result.
+        hinted = solve(problem, time_limit_seconds=20)
+        with mock.patch("solver.greedy_assign", return_value=({}, {}, {}, {})):
+            unhinted = solve(problem, time_limit_seconds=20)
+        self.assertEqual(hinted.status, "OPTIMAL")
+        self.assertEqual(hinted.status, unhinted.status)
+        self.assertEqual(hinted.objective_value, unhinted.objective_value)
+
+    def test_window_min_matches_brute_force(self):
+        """Sliding-window depth minimum agrees with min(depths[p:p + loa]) for every window."""
+        rng = np.random.default_rng(0)
+        for n in (1, 2, 7, 64, 301):
+            depths = rng.uniform(5.0, 20.0, n)
+            depths[rng.random(n) < 0.1] = np.inf  # unlimited-depth stretches
+            for w in sorted({1, 2, 3, n // 2 or 1, n - 1 or 1, n, n + 1, n + 2}):
+                expected = [depths[p:p + w].min() for p in range(n - w + 1)]
+                self.assertEqual(_window_min(depths, w).tolist(), expected, f"n={n}, w={w}")
+
     def _preprocess_vessels(self, problem):
         # Helper to mimic main.py preprocessing
         num_shifts = len(problem.shifts)
@@ -306,5 +404,74 @@ class TestSolverConstraints(unittest.TestCase):
             if v.arrival_time < problem.shifts[0].start_time:
                  v.arrival_shift_index = 0
 
+
+class TestPlotOutputSidecars(unittest.TestCase):
+    """Plots are only re-rendered when their output or its inputs changed."""
+
+    def setUp(self):
+        start = datetime(2026, 1, 1, 0, 0)
+        shifts = [Shift(id=i, start_time=start + timedelta(hours=6 * i),
+                        end_time=start + timedelta(hours=6 * (i + 1))) for i in range(4)]
+        cranes = [Crane("C1", "STS-1", CraneType.STS, 0, 1000, 10, 20),
+                  Crane("C2", "STS-2", CraneType.STS, 0, 1000, 10, 20)]
+        self.problem = Problem(
+            berth=Berth(length=1000, depth=20.0),
+            cranes=cranes,
+            shifts=shifts,
+            vessels=[Vessel("V1", 40, 200, 10, start, start + timedelta(hours=24))],
+            crane_availability_per_shift={t: ["C1", "C2"] for t in range(4)},
+        )
+        self.solution = Solution(
+            [VesselSolution("V1", 100, 0, 2, {0: ["C1", "C2"], 1: ["C1"]})], 0.0, "OPTIMAL")
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.output = os.path.join(tmp.name, "out", "gantt.png")
+        os.makedirs(os.path.dirname(self.output))
+        # Sidecars go to a private directory, never next to the output
+        for patcher in (mock.patch.object(visualization, "PLOT_HASH_DIR", os.path.join(tmp.name, "hashes")),
+                        mock.patch.object(visualization, "_savefig", wraps=visualization._savefig),
+                        mock.patch("builtins.print")):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def assertRenders(self, expected, plot=visualization.plot_solution, **kwargs):
+        before = visualization._savefig.call_count
+        plot(self.problem, self.solution, self.output, **kwargs)
+        self.assertEqual(visualization._savefig.call_count - before, expected)
+
+    def test_second_call_skips(self):
+        out_dir = os.path.dirname(self.output)
+        plots = (visualization.plot_solution, visualization.plot_crane_schedule,
+                 visualization.plot_vessel_execution_gantt)
+        for plot in plots:
+            with self.subTest(plot=plot.__name__):
+                self.output = os.path.join(out_dir, plot.__name__ + ".png")
+                self.assertRenders(1, plot)
+                self.assertRenders(0, plot)
+        # No sidecar files end up next to the plots
+        self.assertEqual(sorted(os.listdir(out_dir)), sorted(p.__name__ + ".png" for p in plots))
+
+    def test_force_renders(self):
+        self.assertRenders(1)
+        self.assertRenders(1, force=True)
+        self.assertRenders(0)
+
+    def test_changed_inputs_render(self):
+        self.assertRenders(1)
+        self.solution.vessel_solutions[0].berth_position = 150
+        self.assertRenders(1)
+        self.assertRenders(1, dpi=72)
+        self.assertRenders(0, dpi=72)
+        with mock.patch.object(visualization, "PLOT_STYLE_VERSION", visualization.PLOT_STYLE_VERSION + 1):
+            self.assertRenders(1, dpi=72)
+
+    def test_deleted_output_is_regenerated(self):
+        self.assertRenders(1)
+        os.remove(self.output)
+        self.assertRenders(1)
+        self.assertTrue(os.path.exists(self.output))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -4,6 +4,8 @@ from dataclasses import dataclass, field
 from enum import Enum
 from typing import List, Dict, Optional
 
+import numpy as np
+
 
 
 class CraneType(str, Enum):
@@ -91,6 +93,8 @@ class Berth:
     length: int  # Total length in meters
     depth: float | None = None  # Uniform depth (if constant)
     depth_map: Dict[int, float] | None = None  # Position -> depth (variable)
+    _depth_cache: Optional[np.ndarray] = field(default=None, init=False, repr=False, compare=False)
+    _depth_key: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
 
     def get_depth_at(self, position: int) -> float:
         """Return the depth at a given position along the berth."""
@@ -108,6 +112,33 @@ class Berth:
             return result
         return float("inf")
 
+    def get_depths(self, positions: Optional[np.ndarray] = None) -> np.ndarray:
+        """Return depths as an array, vectorized equivalent of get_depth_at.
+
+        With no positions, returns the depth of every meter ``range(length)`` as a
+        read-only array, computed once and cached until length, depth or
+        depth_map change. Otherwise returns the depth at each given position.
+        """
+        key = (self.length, self.depth,
+               tuple(sorted(self.depth_map.items())) if self.depth_map is not None else None)
+        if positions is not None:
+            return self._depths_at(np.asarray(positions), key[2])
+        if self._depth_cache is None or self._depth_key != key:
+            depths = self._depths_at(np.arange(self.length), key[2])
+            depths.flags.writeable = False
+            self._depth_cache, self._depth_key = depths, key
+        return self._depth_cache
+
+    def _depths_at(self, positions: np.ndarray, segments) -> np.ndarray:
+        if self.depth is not None:
+            return np.full(positions.shape, self.depth, dtype=np.float64)
+        if segments is not None:
+            # Segment covering p = last map position <= p (0.0 before the first one)
+            breaks = np.array([k for k, _ in segments], dtype=np.int64)
+            values = np.array([0.0] + [d for _, d in segments], dtype=np.float64)
+            return values[np.searchsorted(breaks, positions, side="right")]
+        return np.full(positions.shape, np.inf)
+
 
 @dataclass
 class Problem:
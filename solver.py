@@ -1,19 +1,83 @@
 """BAP + QCAP solver using Google OR-Tools CP-SAT."""
 
-from typing import Dict, List, Tuple
+from bisect import bisect_left
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
 from collections import defaultdict
 
+import numpy as np
 from ortools.sat.python import cp_model
 
 from models import Berth, Problem, Solution, Vessel, VesselSolution, Crane, CraneType
 
 
-def solve(problem: Problem, time_limit_seconds: int = 60) -> Solution:
+# CP-SAT parameters tuned for this model class (scheduling with no-overlap-2d).
+# Any of them can be overridden per call through solve(..., solver_parameters=...).
+DEFAULT_SOLVER_PARAMETERS: Dict[str, Any] = {
+    "num_workers": 8,
+    "linearization_level": 2,
+    "use_timetabling_in_no_overlap_2d": True,
+    "use_energetic_reasoning_in_no_overlap_2d": False,
+    "cp_model_probing_level": 2,
+    "symmetry_level": 2,
+    # Let CP-SAT salvage a partially infeasible hint instead of dropping it,
+    # while keeping presolve and the exact (non-LNS) workers in the portfolio.
+    "repair_hint": True,
+    "cp_model_presolve": True,
+    "use_lns_only": False,
+}
+
+
+def _identical_crane_groups(cranes: List[Crane]) -> List[List[Crane]]:
+    """Group interchangeable cranes (same type, productivity and coverage), each sorted by id."""
+    groups = defaultdict(list)
+    for c in cranes:
+        key = (c.crane_type, c.min_productivity, c.max_productivity,
+               c.berth_range_start, c.berth_range_end)
+        groups[key].append(c)
+    return [sorted(g, key=lambda c: c.id) for g in groups.values() if len(g) > 1]
+
+
+def _window_min(a: np.ndarray, w: int) -> np.ndarray:
+    """Minimum of every length-w window of a (van Herk/Gil-Werman, O(len(a)) for any w)."""
+    n = len(a)
+    blocks = -(-n // w)
+    padded = np.full(blocks * w, np.inf)
+    padded[:n] = a
+    padded = padded.reshape(blocks, w)
+    # prefix[k]: min from the start of k's block up to k; suffix[k]: min from k to its block end
+    prefix = np.minimum.accumulate(padded, axis=1).ravel()
+    suffix = np.minimum.accumulate(padded[:, ::-1], axis=1)[:, ::-1].ravel()
+    # Window [k, k + w) spans at most two blocks, split at the boundary after k.
+    # No window fits when w > n; clamp so both slices are then empty.
+    return np.minimum(suffix[:max(n - w + 1, 0)], prefix[w - 1:n])
+
+
+def _availability_sets(problem: Problem) -> Dict[int, FrozenSet[str]]:
+    """Shift index -> frozenset of available crane ids, for O(1) membership tests."""
+    return {t: frozenset(ids) for t, ids in problem.crane_availability_per_shift.items()}
+
+
+def _productivity_limit(crane: Crane, vessel: Vessel) -> int:
+    """Return the moves per shift a crane delivers under the vessel's productivity preference."""
+    if vessel.productivity_preference == "MIN":
+        return crane.min_productivity
+    if vessel.productivity_preference == "INTERMEDIATE":
+        return (crane.min_productivity + crane.max_productivity) // 2
+    return crane.max_productivity
+
+
+def solve(
+    problem: Problem,
+    time_limit_seconds: int = 60,
+    solver_parameters: Optional[Dict[str, Any]] = None,
+) -> Solution:
     """Solve the integrated BAP + QCAP problem.
 
     Args:
         problem: The problem instance to solve.
         time_limit_seconds: Maximum solver time.
+        solver_parameters: CP-SAT parameters overriding DEFAULT_SOLVER_PARAMETERS
+            (e.g. {"num_workers": 16, "linearization_level": 1}).
 
     Returns:
         A Solution object with berth positions, schedules, and crane assignments.
@@ -27,13 +91,19 @@ def solve(problem: Problem, time_limit_seconds: int = 60) -> Solution:
     
     # Map crane id to object for easy lookup
     crane_map = {c.id: c for c in cranes}
+    avail_sets = _availability_sets(problem)
     
     # =============================================
     # CONSTANTS
     # =============================================
     GAP = 40  # Minimum distance (meters) between vessels and from berth edges
+    ZONE_SCALE = 10  # Yard distance is measured in 10m buckets (decameters)
 
     # --- Spatial discretization for depth constraints ---
+    # Depth of every meter (cached on the berth); per vessel, the depth check is
+    # then a sliding-window minimum over LOA meters.
+    depths = berth.get_depths()
+    window_min_by_loa = {}  # vessels of equal length share one depth scan
     valid_positions = {}
     for i, v in enumerate(vessels):
         valid_positions[i] = []
@@ -43,17 +113,32 @@ def solve(problem: Problem, time_limit_seconds: int = 60) -> Solution:
         
         # Ensure the range is valid (start_p <= end_p)
         if start_p <= end_p:
-            for p in range(start_p, end_p + 1):
-                # Check depth at all meters the vessel occupies
-                min_depth = min(berth.get_depth_at(p + m) for m in range(v.loa))
-                if min_depth >= v.draft:
-                    valid_positions[i].append(p)
+            # window_min[p] = minimum depth over all meters the vessel occupies at p
+            if v.loa not in window_min_by_loa:
+                window_min_by_loa[v.loa] = _window_min(depths, v.loa)
+            window_min = window_min_by_loa[v.loa][start_p:end_p + 1]
+            valid_positions[i] = (np.flatnonzero(window_min >= v.draft) + start_p).tolist()
         
         if not valid_positions[i]:
             print(f"WARNING: No valid berth position for vessel {v.name} "
                   f"(draft={v.draft}, loa={v.loa}) with {GAP}m margins")
             return Solution([], 0, "INFEASIBLE")
 
+    # --- Crane reach pre-filter ---
+    # A crane can only work vessel i if some valid position puts the whole hull
+    # inside its coverage; moves for any other crane are never created.
+    enforce_reach = problem.solver_rules.get("enable_crane_reach", True)
+    reachable = {}
+    for i, v in enumerate(vessels):
+        reachable[i] = set()
+        for c in cranes:
+            if not enforce_reach:
+                reachable[i].add(c.id)
+                continue
+            k = bisect_left(valid_positions[i], c.berth_range_start)
+            if k < len(valid_positions[i]) and valid_positions[i][k] + v.loa <= c.berth_range_end:
+                reachable[i].add(c.id)
+
     # =============================================
     # DECISION VARIABLES
     # =============================================
@@ -61,26 +146,28 @@ def solve(problem: Problem, time_limit_seconds: int = 60) -> Solution:
     # 1. Berth position p_i (integer variable, meter on the berth)
     pos = {}
     for i, v in enumerate(vessels):
-        pos[i] = model.new_int_var(
-            min(valid_positions[i]),
-            max(valid_positions[i]),
+        # Domain restricted to valid positions (depth constraint), holes included
+        pos[i] = model.new_int_var_from_domain(
+            cp_model.Domain.from_values(valid_positions[i]),
             f"pos_{v.name}",
         )
-        # Restrict to valid positions (depth constraint)
-        if len(valid_positions[i]) < (max(valid_positions[i]) - min(valid_positions[i]) + 1):
-            model.add_allowed_assignments([pos[i]], [[p] for p in valid_positions[i]])
 
     # 2. Start/End shifts
     start = {}
     end = {}
     duration = {}
     moves = {} # NEW: integer variable [c, i, t]
-    
-    # Active indicator (needed for spatial/temporal)
-    active = {}
-    
-    is_after_start_dict = {}
-    is_before_end_dict = {}
+    # crane_active_indicators[c, i, t] <=> moves[c, i, t] > 0
+    crane_active_indicators = {}
+    # move_limits[c, i, t]: upper bound of moves[c, i, t] (rate incl. arrival fraction)
+    move_limits = {}
+
+    # Lookup indexes filled while creating moves, so constraints below iterate
+    # only over existing variables instead of probing every crane.
+    moves_by_vessel = defaultdict(list)        # i -> [moves]
+    moves_by_crane_shift = defaultdict(list)   # (c, t) -> [moves]
+    active_by_vessel_shift = defaultdict(list) # (i, t) -> [indicators]
+    active_by_crane_shift = defaultdict(list)  # (c, t) -> [(i, indicator)]
 
     for i, v in enumerate(vessels):
         # 1. Variables - Time
@@ -88,40 +175,28 @@ def solve(problem: Problem, time_limit_seconds: int = 60) -> Solution:
         min_start = v.arrival_shift_index if v.arrival_shift_index >= 0 else 0
         if min_start >= T: min_start = T - 1
 
+        # Duration lower bound: even the k most productive cranes working every
+        # shift need ceil(workload / their combined rate) shifts.
+        k = v.max_cranes if problem.solver_rules.get("enable_max_cranes", True) else len(cranes)
+        best_rate = sum(sorted((_productivity_limit(c, v) for c in cranes), reverse=True)[:k])
+        min_dur = -(-v.workload // best_rate) if best_rate > 0 else 1
+        min_dur = min(max(min_dur, 1), T)
+
         start[i] = model.new_int_var(min_start, T - 1, f"start_{v.name}")
         end[i] = model.new_int_var(min_start + 1, T, f"end_{v.name}")
-        duration[i] = model.new_int_var(1, T, f"dur_{v.name}")
+        duration[i] = model.new_int_var(min_dur, T, f"dur_{v.name}")
         
         # KEY CONSTRAINT: Start shift MUST be >= Arrival shift
         # This prevents vessels from starting before they arrive.
         model.add(start[i] >= min_start)
         
         model.add(end[i] == start[i] + duration[i])
-        
-        # Create active booleans for each shift
-        for t in range(T):
-            active[i, t] = model.new_bool_var(f"active_{v.name}_{t}")
-            
-            # Reification: active <=> start <= t < end
-            is_after_start = model.new_bool_var(f"{v.name}_after_start_{t}")
-            is_before_end = model.new_bool_var(f"{v.name}_before_end_{t}")
-            
-            is_after_start_dict[i, t] = is_after_start # STORE IT
-            is_before_end_dict[i, t] = is_before_end   # STORE IT
-
-            model.add(start[i] <= t).only_enforce_if(is_after_start)
-            model.add(start[i] > t).only_enforce_if(is_after_start.Not())
-            model.add(end[i] > t).only_enforce_if(is_before_end)
-            model.add(end[i] <= t).only_enforce_if(is_before_end.Not())
-            
-            model.add_bool_and([is_after_start, is_before_end]).only_enforce_if(active[i, t])
-            model.add_bool_or([is_after_start.Not(), is_before_end.Not()]).only_enforce_if(active[i, t].Not())
 
 
     # 2. Crane Moves (Integer)
     # moves[c, i, t] = Number of moves crane c performs for vessel i in shift t
     for t in range(T):
-        available_crane_ids = problem.crane_availability_per_shift.get(t, [])
+        available_crane_ids = avail_sets.get(t, frozenset())
         for c_idx, c in enumerate(cranes):
             if c.id not in available_crane_ids: continue
             
@@ -132,69 +207,47 @@ def solve(problem: Problem, time_limit_seconds: int = 60) -> Solution:
                     # Force moves to 0 if shift is before arrival
                     # This is redundant if start[i] >= arrival constraint works, but good for safety
                     continue 
+
+                # Crane can never reach this vessel
+                if c.id not in reachable[i]:
+                    continue
                 
                 # Max prod limit logic
-                limit = c.max_productivity
-                if v.productivity_preference == "MIN": limit = c.min_productivity
-                elif v.productivity_preference == "INTERMEDIATE": limit = (c.min_productivity + c.max_productivity) // 2
+                limit = _productivity_limit(c, v)
                 
                 # Arrival fraction
                 if t == v.arrival_shift_index:
                     limit = int(limit * v.arrival_fraction)
                 
-                if limit > 0:
-                    mv = model.new_int_var(0, limit, f"moves_{c.id}_{i}_{t}")
-                    moves[c.id, i, t] = mv
-                    
-                    # Link to active: if moves > 0, vessel must be active
-                    # active=0 => moves=0
-                    model.add(mv == 0).only_enforce_if(active[i, t].Not())
-                    
-                    
-                    # ALSO: If this shift is BEFORE vessel start, moves MUST be 0
-                    if (i, t) in is_after_start_dict:
-                        # is_after_start is True if start <= t.
-                        # So if is_after_start is False => start > t => shift t is BEFORE start.
-                        # In that case, moves MUST be 0.
-                        model.add(mv == 0).only_enforce_if(is_after_start_dict[i, t].Not())
+                if limit <= 0:
+                    continue
+
+                mv = model.new_int_var(0, limit, f"moves_{c.id}_{i}_{t}")
+                moves[c.id, i, t] = mv
+                move_limits[c.id, i, t] = limit
+
+                # Indicator: active=1 <=> moves > 0, as two linear (big-M) constraints
+                b_act = model.new_bool_var(f"ind_{c.id}_{i}_{t}")
+                model.add(mv <= limit * b_act)
+                model.add(mv >= b_act)
+                crane_active_indicators[c.id, i, t] = b_act
+
+                # A working crane puts shift t inside the vessel's [start, end) window,
+                # so no moves can happen before start or after end.
+                model.add(start[i] <= t).only_enforce_if(b_act)
+                model.add(end[i] > t).only_enforce_if(b_act)
+
+                moves_by_vessel[i].append(mv)
+                moves_by_crane_shift[c.id, t].append(mv)
+                active_by_vessel_shift[i, t].append(b_act)
+                active_by_crane_shift[c.id, t].append((i, b_act))
 
     # =============================================
     # CONSTRAINTS
     # =============================================
 
     # --- 4.1 Spatial constraints ---
-    for i, v in enumerate(vessels):
-        # pos[i] var defined earlier? No, define now.
-        if i not in pos: 
-            # Should have been defined? No, let's look at full file structure.
-            # pos is typically defined at start.
-            # Assuming 'pos' passed in Dict or created here?
-            # Existing code expects 'pos'. Let's ensure it exists.
-            # Check lines 58: pos = {} defined?
-            pass
-
-    # Ensure pos variables exist (might be redundant if defined above in older code, but safe here)
-    # We need to recreate them if not present, but better to rely on context.
-    # The snippet 75 starts inside the Variable creation block. 
-    # pos was typically earlier. Let's assume it's there.
-    # Wait, previous view showed line 75 start... pos was created at line 66 in previous versions?
-    # No, pos logic was usually inside the loop.
-    
-    # RE-CREATING POS LOOP just in case, or finding where it was.
-    # Code view 75-148 doesn't show pos creation!
-    # It accesses pos[i] at line 111. So pos must be created.
-    # Previous code snippet 75... doesn't show pos creation.
-    # It must have been before line 75?
-    # Let's create pos loop here to be sure.
-    
-    # (Re)define pos if empty
-    if not pos:
-        for i, v in enumerate(vessels):
-             pos[i] = model.new_int_var(0, problem.berth.length - v.loa, f"pos_{v.name}")
-
-    for i, v in enumerate(vessels):
-        model.add(pos[i] >= GAP)
-        model.add(pos[i] + v.loa <= berth.length - GAP)
+    # Berth edge margins (GAP) are already part of each pos[i] domain.
 
     # --- 4.2 Non-overlap: spatial + temporal ---
     x_intervals = []
@@ -242,61 +295,39 @@ def solve(problem: Problem, time_limit_seconds: int = 60) -> Solution:
     # 2.1 Workload Fullfillment
     # sum(moves[c, i, t]) >= v.workload
     for i, v in enumerate(vessels):
-        v_moves = []
-        for t in range(T):
-            for c in cranes:
-                if (c.id, i, t) in moves:
-                    v_moves.append(moves[c.id, i, t])
-        model.add(sum(v_moves) >= v.workload)
+        model.add(sum(moves_by_vessel[i]) >= v.workload)
 
     # 2.2 Crane Capacity (Shifting Gang)
     # The sum of moves a crane performs across ALL vessels in one shift <= max_productivity.
     if problem.solver_rules.get("enable_crane_capacity", True):
-        for t in range(T):
-            for c in cranes:
-                c_moves_in_shift = []
-                for i in range(len(vessels)):
-                    if (c.id, i, t) in moves:
-                        c_moves_in_shift.append(moves[c.id, i, t])
-                
-                if c_moves_in_shift:
-                    model.add(sum(c_moves_in_shift) <= c.max_productivity)
+        for (c_id, t), c_moves_in_shift in moves_by_crane_shift.items():
+            model.add(sum(c_moves_in_shift) <= crane_map[c_id].max_productivity)
 
     # 2.3 Max Cranes per Vessel
     # sum(crane_active[:, i, t]) <= v.max_cranes
-    # We need crane_active[c,i,t] indicators.
-    crane_active_indicators = {}
-    
-    for (c_id, i, t), m_var in moves.items():
-        # Indicator: if moves > 0 => active=1
-        b_act = model.new_bool_var(f"ind_{c_id}_{i}_{t}")
-        model.add(m_var > 0).only_enforce_if(b_act)
-        model.add(m_var == 0).only_enforce_if(b_act.Not())
-        crane_active_indicators[c_id, i, t] = b_act
-
     if problem.solver_rules.get("enable_max_cranes", True):
         for i, v in enumerate(vessels):
+            served_shifts = []
             for t in range(T):
-                active_vars = []
-                for c in cranes:
-                    if (c.id, i, t) in crane_active_indicators:
-                        active_vars.append(crane_active_indicators[c.id, i, t])
+                active_vars = active_by_vessel_shift.get((i, t), [])
                 
                 # Max cranes constraint
                 model.add(sum(active_vars) <= v.max_cranes)
                 
-                # Link to Vessel Active: If Vessel Active, Must have at least 1 crane working?
-                # Or at least > 0 moves total? Use moves sum.
-                moves_vars = []
-                for c in cranes:
-                        if (c.id, i, t) in moves:
-                            moves_vars.append(moves[c.id, i, t])
-                
-                # If active[i,t], sum(moves) >= 1 (Must work if berthed/active)
+                # Link to Vessel Active: If Vessel Active, Must have at least 1 crane working.
+                # If served, some crane indicator is on (i.e. moves > 0) -- a single clause
+                # over the indicators instead of a reified linear sum over the moves.
                 # This minimizes "dead time" at berth.
                 # Only enforce if enable_min_cranes_on_arrival is True or part of basic logic
-                if problem.solver_rules.get("enable_min_cranes_on_arrival", True):
-                     model.add(sum(moves_vars) >= 1).only_enforce_if(active[i, t])
+                if problem.solver_rules.get("enable_min_cranes_on_arrival", True) and active_vars:
+                    is_served = model.new_bool_var(f"served_{v.name}_{t}")
+                    model.add_bool_or(active_vars).only_enforce_if(is_served)
+                    served_shifts.append(is_served)
+
+            # Work only happens inside [start, end), so needing as many served shifts
+            # as the duration means every shift at berth has a crane working.
+            if problem.solver_rules.get("enable_min_cranes_on_arrival", True):
+                model.add(sum(served_shifts) >= duration[i])
 
     # 2.4 Crane Reach Constraints
     if problem.solver_rules.get("enable_crane_reach", True):
@@ -314,75 +345,74 @@ def solve(problem: Problem, time_limit_seconds: int = 60) -> Solution:
             key=lambda c: (c.berth_range_start, c.id),
         )
 
-        for idx1 in range(len(sts_cranes)):
-            for idx2 in range(idx1 + 1, len(sts_cranes)):
-                c1 = sts_cranes[idx1]
-                c2 = sts_cranes[idx2]
-
-                for t in range(T):
-                    # Iterate all vessel pairs
-                    for i_a in range(len(vessels)):
-                        for i_b in range(len(vessels)):
-                            if i_a == i_b:
-                                continue
-
-                            k1 = (c1.id, i_a, t)
-                            k2 = (c2.id, i_b, t)
-
-                            if k1 in crane_active_indicators and k2 in crane_active_indicators:
-                                a1 = crane_active_indicators[k1]
-                                a2 = crane_active_indicators[k2]
-
-                                # both_active <=> (a1 AND a2)
-                                both_active = model.new_bool_var(
-                                    f"cross_{t}_{c1.id}_{i_a}_{c2.id}_{i_b}"
-                                )
-                                model.add_implication(both_active, a1)
-                                model.add_implication(both_active, a2)
-                                model.add_bool_or([a1.Not(), a2.Not(), both_active])
-
-                                # If both cranes are simultaneously active, left crane must be on left vessel.
-                                model.add(pos[i_a] <= pos[i_b]).only_enforce_if(both_active)
+        # Each STS crane spans [lo, hi] over the positions of the vessels it serves in a
+        # shift, and its span must end before the next crane's span begins. Chaining
+        # consecutive cranes yields the full pairwise order; an idle crane's span
+        # simply floats between its neighbours.
+        for t in range(T):
+            working = [c for c in sts_cranes if (c.id, t) in active_by_crane_shift]
+            if len(working) < 2:
+                continue
+
+            prev_hi = None
+            for c in sts_cranes:
+                lo = model.new_int_var(0, berth.length, f"sts_lo_{c.id}_{t}")
+                hi = model.new_int_var(0, berth.length, f"sts_hi_{c.id}_{t}")
+                model.add(lo <= hi)
+                for i, b_act in active_by_crane_shift.get((c.id, t), []):
+                    model.add(lo <= pos[i]).only_enforce_if(b_act)
+                    model.add(pos[i] <= hi).only_enforce_if(b_act)
+                if prev_hi is not None:
+                    model.add(prev_hi <= lo)
+                prev_hi = hi
+
+    # 2.5b Symmetry breaking among identical cranes
+    # Swapping the whole shift plan of two identical cranes yields an equivalent
+    # solution, so their per-shift workloads are ordered by crane id. STS cranes
+    # are excluded while non-crossing is on: their left-to-right order matters.
+    for group in _identical_crane_groups(cranes):
+        if group[0].crane_type == CraneType.STS and problem.solver_rules.get("enable_sts_non_crossing", True):
+            continue
+        for c_a, c_b in zip(group, group[1:]):
+            for t in range(T):
+                available_crane_ids = avail_sets.get(t, frozenset())
+                if c_a.id not in available_crane_ids or c_b.id not in available_crane_ids:
+                    continue
+                model.add(
+                    sum(moves_by_crane_shift.get((c_a.id, t), []))
+                    >= sum(moves_by_crane_shift.get((c_b.id, t), []))
+                )
 
     # 2.6 Restricted Shifting Gang Constraint
     # A crane must work at FULL capacity on a vessel unless it is the LAST shift for that vessel.
     if problem.solver_rules.get("enable_shifting_gang", True):
-        for t in range(T):
-            available_crane_ids = problem.crane_availability_per_shift.get(t, [])
-            for c_idx, c in enumerate(cranes):
-                if c.id not in available_crane_ids: continue
-                
-                for i, v in enumerate(vessels):
-                    # Only if variable exists
-                    if (c.id, i, t) not in moves: continue
-                    
-                    mv = moves[c.id, i, t]
-                    # Re-calculate limit used for domain
-                    limit = c.max_productivity
-                    if v.productivity_preference == "MIN": limit = c.min_productivity
-                    elif v.productivity_preference == "INTERMEDIATE": limit = (c.min_productivity + c.max_productivity) // 2
-                    
-                    # Check arrival fraction? If arrival shift is NOT last shift, then it must be full *available* capacity? 
-                    # Yes. If t == arrival_shift, limit is reduced. Constraint should enforce *that* reduced limit.
-                    if t == v.arrival_shift_index:
-                        limit = int(limit * v.arrival_fraction)
-                    
-                    # Condition: t < end[i] - 1  (Not the last shift)
-                    # We use reified constraint.
-                    # is_intermediate <=> t <= end[i] - 2
-                    
-                    is_intermediate = model.new_bool_var(f"is_intermediate_{c.id}_{v.name}_{t}")
-                    model.add(t <= end[i] - 2).only_enforce_if(is_intermediate)
-                    model.add(t > end[i] - 2).only_enforce_if(is_intermediate.Not())
-                    
-                    # Indicator: Crane Active
-                    # We need to know if crane IS active. We have crane_active_indicators.
-                    if (c.id, i, t) in crane_active_indicators:
-                        b_act = crane_active_indicators[c.id, i, t]
-                        
-                        # Constraint: If (Active AND Intermediate) => moves == limit
-                        # i.e., NO PARTIAL WORK allowed in intermediate shifts.
-                        model.add(mv == limit).only_enforce_if([b_act, is_intermediate])
+        # is_intermediate[i, t] <=> t <= end[i] - 2 depends only on (vessel, shift),
+        # so it is created once and shared by every crane working that vessel.
+        is_intermediate_it = {}
+
+        for (c_id, i, t), mv in moves.items():
+            v = vessels[i]
+
+            # Full available capacity; on the arrival shift this is already the
+            # reduced (arrival fraction) limit used for the variable's domain.
+            limit = move_limits[c_id, i, t]
+
+            # Condition: t < end[i] - 1  (Not the last shift)
+            # We use reified constraint.
+            # is_intermediate <=> t <= end[i] - 2
+            if (i, t) not in is_intermediate_it:
+                b = model.new_bool_var(f"is_intermediate_{v.name}_{t}")
+                model.add(t <= end[i] - 2).only_enforce_if(b)
+                model.add(t > end[i] - 2).only_enforce_if(b.Not())
+                is_intermediate_it[i, t] = b
+            is_intermediate = is_intermediate_it[i, t]
+            
+            # Indicator: Crane Active
+            b_act = crane_active_indicators[c_id, i, t]
+            
+            # Constraint: If (Active AND Intermediate) => moves == limit
+            # i.e., NO PARTIAL WORK allowed in intermediate shifts.
+            model.add(mv == limit).only_enforce_if([b_act, is_intermediate])
 
 
     # =============================================
@@ -390,50 +420,22 @@ def solve(problem: Problem, time_limit_seconds: int = 60) -> Solution:
     # =============================================
     
     makespan = model.new_int_var(0, T, "makespan")
-    for i in range(n):
-        model.add(makespan >= end[i])
+    model.add_max_equality(makespan, [end[i] for i in range(n)])
 
-    total_turnaround = model.new_int_var(0, T * n * 2, "total_turnaround")
-    turnaround_terms = []
-    
-    total_waiting_time = model.new_int_var(0, T * n, "total_waiting_time")
-    waiting_terms = []
-    
-    for i, v in enumerate(vessels):
-        # Fallback to 0 if arrival shift is invalid/negative for calc purposes
-        ref_start = v.arrival_shift_index if v.arrival_shift_index >= 0 else 0
-        
-        # Turnaround: end - arrival
-        t_i = model.new_int_var(-T, T, f"turnaround_{v.name}")
-        model.add(t_i == end[i] - ref_start)
-        turnaround_terms.append(t_i)
-        
-        # Waiting: start - arrival
-        w_i = model.new_int_var(-T, T, f"waiting_{v.name}")
-        model.add(w_i == start[i] - ref_start)
-        waiting_terms.append(w_i)
-        
-    model.add(total_turnaround == sum(turnaround_terms))
-    model.add(total_waiting_time == sum(waiting_terms))
+    # Objective totals are plain linear expressions; CP-SAT needs no auxiliary
+    # variable to hold them.
+
+    # Fallback to 0 if arrival shift is invalid/negative for calc purposes
+    ref_starts = [v.arrival_shift_index if v.arrival_shift_index >= 0 else 0 for v in vessels]
+
+    # Turnaround: end - arrival
+    total_turnaround = cp_model.LinearExpr.sum([end[i] for i in range(n)]) - sum(ref_starts)
 
     # Total crane usage (number of crane-shifts)
-    # Calculate active cranes for objective
-    crane_active_vars = []
-    for (c, i, t), m_var in moves.items():
-        # Create boolean indicator if not exists
-        b_var = model.new_bool_var(f"active_{c}_{i}_{t}")
-        model.add(m_var > 0).only_enforce_if(b_var)
-        model.add(m_var == 0).only_enforce_if(b_var.Not())
-        crane_active_vars.append(b_var)
-
-    total_cranes_used = model.new_int_var(0, len(crane_active_vars) + 1, "total_cranes")
-    if crane_active_vars:
-        model.add(total_cranes_used == sum(crane_active_vars))
-    else:
-        model.add(total_cranes_used == 0)
+    crane_active_vars = list(crane_active_indicators.values())
+    total_cranes_used = cp_model.LinearExpr.sum(crane_active_vars)
 
     # --- Yard Zone Alignment (New) ---
-    total_yard_distance = model.new_int_var(0, berth.length * n, "total_yard_distance")
     yard_dist_terms = []
     
     if problem.solver_rules.get("enable_yard_preferences", True):
@@ -446,24 +448,24 @@ def solve(problem: Problem, time_limit_seconds: int = 60) -> Solution:
                 best_pref = max(v.target_zones, key=lambda x: x.volume)
                 if best_pref.yard_quay_zone_id in yard_zone_map:
                     zone = yard_zone_map[best_pref.yard_quay_zone_id]
-                    zone_center = (zone.start_dist + zone.end_dist) // 2
-                    
-                    # Vessel Center = pos[i] + v.loa // 2
-                    # Distance = abs((pos[i] + v.loa // 2) - zone_center)
+                    zone_center_q = (zone.start_dist + zone.end_dist) // 2 // ZONE_SCALE
                     
-                    dist_var = model.new_int_var(0, berth.length, f"yard_dist_{v.name}")
+                    # Vessel Center = pos[i] + v.loa // 2, quantized to ZONE_SCALE buckets
+                    # Distance = abs(center_q - zone_center_q)
+                    # pos[i] keeps its meter domain; only the distance is coarser.
+                    length_q = berth.length // ZONE_SCALE
+                    center_q = model.new_int_var(0, length_q, f"yard_center_{v.name}")
+                    model.add_division_equality(center_q, pos[i] + (v.loa // 2), ZONE_SCALE)
+
+                    dist_var = model.new_int_var(0, length_q, f"yard_dist_{v.name}")
                     
-                    v_center_expr = pos[i] + (v.loa // 2)
-                    
-                    model.add(dist_var >= v_center_expr - zone_center)
-                    model.add(dist_var >= zone_center - v_center_expr)
+                    diff = model.new_int_var(-length_q, length_q, f"yard_diff_{v.name}")
+                    model.add(diff == center_q - zone_center_q)
+                    model.add_abs_equality(dist_var, diff)
                     
                     yard_dist_terms.append(dist_var)
 
-    if yard_dist_terms:
-         model.add(total_yard_distance == sum(yard_dist_terms))
-    else:
-         model.add(total_yard_distance == 0)
+    total_yard_distance = cp_model.LinearExpr.sum(yard_dist_terms)
 
 
     # --- WEIGHTS (Priorities) ---
@@ -475,41 +477,46 @@ def solve(problem: Problem, time_limit_seconds: int = 60) -> Solution:
     
     W_START_DELAY = 5000  # HUGE Penalty: 1 shift delay costs more than ANY yard distance deviation (max ~1000)
     W_TURNAROUND = 500    # High priority to minimize duration once started
-    W_WAITING = 0         # Unused now
     W_MAKESPAN = 100
     W_CRANES = -100       # Reward for high productivity
-    W_YARD_DIST = 1       # 1m deviation = 1 point cost. Max ~1000. 
-                          # Since W_START_DELAY=5000, 1 shift delay > 5000 > 1000 distance penalty.
-                          # This ensures vessel NEVER delays just for position.
+    W_YARD_DIST = ZONE_SCALE  # 1 decameter (10m bucket) deviation = 10 points.
+                              # On a 1000m berth a vessel is at most 100 decameters off: <= 1000 points.
+                              # Since W_START_DELAY=5000, 1 shift delay > 5000 > 1000 distance penalty.
+                              # This ensures vessel NEVER delays just for position.
 
-    # Calculate Start Delay
-    total_start_delay = model.new_int_var(0, T * n, "total_start_delay")
-    start_delay_terms = []
-    
-    for i, v in enumerate(vessels):
-        ref_start = v.arrival_shift_index if v.arrival_shift_index >= 0 else 0
-        delay = model.new_int_var(0, T, f"start_delay_{v.name}")
-        model.add(delay == start[i] - ref_start)
-        start_delay_terms.append(delay)
-        
-    model.add(total_start_delay == sum(start_delay_terms))
+    # Start Delay: start - arrival
+    total_start_delay = cp_model.LinearExpr.sum([start[i] for i in range(n)]) - sum(ref_starts)
 
     model.minimize(
-        W_TURNAROUND * total_turnaround
-        # + W_WAITING * total_waiting_time 
-        + W_START_DELAY * total_start_delay
-        + W_MAKESPAN * makespan
-        + W_CRANES * total_cranes_used
-        + W_YARD_DIST * total_yard_distance
+        cp_model.LinearExpr.weighted_sum(
+            [total_turnaround, total_start_delay, makespan, total_cranes_used, total_yard_distance],
+            [W_TURNAROUND, W_START_DELAY, W_MAKESPAN, W_CRANES, W_YARD_DIST],
+        )
     )
 
+    # =============================================
+    # WARM START (greedy FCFS hint)
+    # =============================================
+    hint_pos, hint_start, hint_end, hint_moves = greedy_assign(problem, valid_positions, GAP)
+    for i in hint_pos:
+        model.add_hint(pos[i], hint_pos[i])
+        model.add_hint(start[i], hint_start[i])
+        model.add_hint(end[i], hint_end[i])
+        model.add_hint(duration[i], hint_end[i] - hint_start[i])
+    for (c_id, i, t), mv in moves.items():
+        if i in hint_pos:
+            m = hint_moves.get((c_id, i, t), 0)
+            model.add_hint(mv, m)
+            model.add_hint(crane_active_indicators[c_id, i, t], m > 0)
+
     # =============================================
     # SOLVE
     # =============================================
     solver = cp_model.CpSolver()
     solver.parameters.max_time_in_seconds = time_limit_seconds
     solver.parameters.log_search_progress = True
-    solver.parameters.num_workers = 8
+    for name, value in {**DEFAULT_SOLVER_PARAMETERS, **(solver_parameters or {})}.items():
+        setattr(solver.parameters, name, value)
 
     status = solver.solve(model)
     status_name = {
@@ -536,6 +543,131 @@ def solve(problem: Problem, time_limit_seconds: int = 60) -> Solution:
         pos
     )
 
+def greedy_assign(
+    problem: Problem,
+    valid_positions: Dict[int, List[int]],
+    gap: int,
+) -> Tuple[Dict[int, int], Dict[int, int], Dict[int, int], Dict[Tuple[str, int, int], int]]:
+    """First-come-first-served heuristic used to warm-start CP-SAT.
+
+    Vessels are taken in arrival order and placed at the earliest start shift
+    and leftmost valid position that does not collide with vessels already
+    placed (or forbidden zones). In every shift the vessel takes the most
+    productive free cranes that reach it, working at full rate until the
+    workload is done. Work is then relabelled among identical cranes to match
+    the model's symmetry breaking and STS left-to-right order; non-crossing
+    between different STS cranes is not checked, the plan only seeds the
+    solver hint, which CP-SAT repairs.
+
+    Returns:
+        (pos, start, end, moves) for the vessels that could be placed, indexed
+        by vessel index; moves is keyed by (crane_id, vessel_index, shift).
+    """
+    T = problem.num_shifts
+    vessels = problem.vessels
+    rules = problem.solver_rules
+
+    avail_sets = _availability_sets(problem)
+    jobs = {}  # (crane_id, shift) -> (vessel_index, moves)
+    occupied = []  # (x_start, x_end, t_start, t_end) blocked rectangles
+    if rules.get("enable_forbidden_zones", True):
+        for z in problem.forbidden_zones:
+            occupied.append((z.start_berth_position, z.end_berth_position, z.start_shift, z.end_shift))
+
+    def crane_plan(v: Vessel, p: int, s: int):
+        """Shift-by-shift crane work for vessel v berthed at p from shift s, or None."""
+        remaining = v.workload
+        work = {}
+        t = s
+        while remaining > 0:
+            if t >= T:
+                return None
+            available_crane_ids = avail_sets.get(t, frozenset())
+            options = []
+            for c in problem.cranes:
+                if c.id not in available_crane_ids or (c.id, t) in jobs:
+                    continue
+                if rules.get("enable_crane_reach", True) and not (
+                    c.berth_range_start <= p and p + v.loa <= c.berth_range_end
+                ):
+                    continue
+                limit = _productivity_limit(c, v)
+                if t == v.arrival_shift_index:
+                    limit = int(limit * v.arrival_fraction)
+                if limit > 0:
+                    options.append((limit, c.id))
+            if not options:
+                return None
+            options.sort(key=lambda o: (-o[0], o[1]))
+            if rules.get("enable_max_cranes", True):
+                options = options[:v.max_cranes]
+            for limit, c_id in options:
+                if remaining <= 0:
+                    break
+                work[c_id, t] = min(limit, remaining)
+                remaining -= work[c_id, t]
+            t += 1
+        return t, work
+
+    pos_val, start_val, end_val = {}, {}, {}
+    order = sorted(range(len(vessels)), key=lambda i: (max(vessels[i].arrival_shift_index, 0), i))
+    for i in order:
+        v = vessels[i]
+        positions = valid_positions[i]
+        first_shift = min(max(v.arrival_shift_index, 0), T - 1)
+
+        # Leftmost candidates: first valid position, and the first valid
+        # position right of every blocked rectangle.
+        candidates = {positions[0]}
+        for x0, x1, t0, t1 in occupied:
+            k = bisect_left(positions, x1)
+            if k < len(positions):
+                candidates.add(positions[k])
+
+        placement = None
+        for s in range(first_shift, T):
+            for p in sorted(candidates):
+                plan = crane_plan(v, p, s)
+                if plan is None:
+                    continue
+                e, work = plan
+                if any(p < x1 and x0 < p + v.loa + gap and s < t1 and t0 < e
+                       for x0, x1, t0, t1 in occupied):
+                    continue
+                placement = (p, s, e, work)
+                break
+            if placement:
+                break
+        if placement is None:
+            continue
+
+        p, s, e, work = placement
+        pos_val[i], start_val[i], end_val[i] = p, s, e
+        occupied.append((p, p + v.loa + gap, s, e))
+        for (c_id, t), m in work.items():
+            jobs[c_id, t] = (i, m)
+
+    # Identical cranes are interchangeable within a shift: hand the heaviest
+    # job to the lowest id (symmetry breaking), or for STS cranes under
+    # non-crossing, serve vessels left to right.
+    sts_ordered = rules.get("enable_sts_non_crossing", True)
+    for group in _identical_crane_groups(problem.cranes):
+        by_position = group[0].crane_type == CraneType.STS and sts_ordered
+        for t in range(T):
+            available_crane_ids = avail_sets.get(t, frozenset())
+            members = [c.id for c in group if c.id in available_crane_ids]
+            shift_jobs = [jobs.pop((c_id, t)) for c_id in members if (c_id, t) in jobs]
+            if by_position:
+                shift_jobs.sort(key=lambda job: pos_val[job[0]])
+            else:
+                shift_jobs.sort(key=lambda job: -job[1])
+            for c_id, job in zip(members, shift_jobs):
+                jobs[c_id, t] = job
+
+    moves_val = {(c_id, i, t): m for (c_id, t), (i, m) in jobs.items()}
+    return pos_val, start_val, end_val, moves_val
+
+
 def extract_solution(
     problem: Problem, 
     solver: cp_model.CpSolver, 
@@ -559,15 +691,21 @@ def extract_solution(
     
     assignments = {i: defaultdict(list) for i in range(len(problem.vessels))}
     
-    for (c_id, i, t), var in moves.items():
-        val = solver.value(var)
-        if val > 0:
-            assignments[i][t].append(c_id)
+    # Fetch the full assignment once and index it by variable position,
+    # instead of one solver.value() round-trip per variable.
+    values = np.asarray(solver.response_proto.solution, dtype=np.int64)
+
+    # Gather all move values with one fancy-index and visit only the non-zero ones.
+    move_keys = list(moves.keys())
+    move_idx = np.fromiter((var.index for var in moves.values()), dtype=np.int64, count=len(move_keys))
+    for k in np.flatnonzero(values[move_idx] > 0):
+        c_id, i, t = move_keys[k]
+        assignments[i][t].append(c_id)
 
     for i, v in enumerate(problem.vessels):
-        s_val = solver.value(start[i])
-        e_val = solver.value(end[i])
-        p_val = solver.value(pos[i])
+        s_val = int(values[start[i].index])
+        e_val = int(values[end[i].index])
+        p_val = int(values[pos[i].index])
         
         # Filter assigned_cranes to only those in [start, end)
         # (Though constraints enforce moves=0 outside active)
@@ -1,57 +1,236 @@
 """Visualization for BAP + QCAP solutions: Space-Time Gantt chart."""
 
+import hashlib
+import os
+import sys
+import tempfile
+import matplotlib
+import matplotlib.colors as mcolors
 import matplotlib.patches as mpatches
 import matplotlib.pyplot as plt
+import numpy as np
 from collections import defaultdict
+from matplotlib import colormaps
+from matplotlib.collections import PolyCollection
+from matplotlib.font_manager import FontProperties
+from matplotlib.lines import Line2D
+from matplotlib.text import Text
 
-from models import Problem, Solution
+from models import Problem, ProductivityMode, Solution
 
 
-COLORS = [
+_COLORS_HEX = [
     "#4e79a7", "#f28e2b", "#e15759", "#76b7b2", "#59a14f",
     "#edc948", "#b07aa1", "#ff9da7", "#9c755f", "#bab0ac",
     "#86bcb6", "#8cd17d", "#b6992d", "#499894", "#d37295",
 ]
+# Parsed to RGBA once here rather than by matplotlib for every artist
+COLORS = [mcolors.to_rgba(h) for h in _COLORS_HEX]
 
+# zlib level 3 instead of the default 6: several times less deflate CPU for a
+# few percent larger files on these flat-colour charts.
+PNG_PIL_KWARGS = {"compress_level": 3, "optimize": False}
 
-def plot_solution(problem: Problem, solution: Solution, output_path: str = "gantt.png"):
+# Collections with at least this many rectangles are rasterized: in PDF/SVG
+# output they become one image layer (labels stay vector text) instead of
+# thousands of vector paths. Smaller ones are cheaper as vectors. No effect on PNG.
+RASTERIZE_MIN_PATCHES = 200
+
+# Legends are always built from explicit handles with a fixed loc: loc="best"
+# scores every candidate position against every artist, and plotted artists
+# carry no label= so nothing is collected implicitly.
+# plot_solution skips the vessel legend above this many vessels
+LEGEND_MAX_VESSELS = 30
+
+
+def _savefig(fig, output_path: str, dpi: int = 150):
+    """Save fig; PNG-only encoder options are passed only when writing a PNG.
+
+    PNGs from an Agg canvas are written with print_png directly, skipping the
+    savefig/print_figure wrappers (format dispatch, bbox and color handling)
+    that these plots do not need.
+    """
+    if not output_path.lower().endswith(".png"):
+        fig.savefig(output_path, dpi=dpi)
+    elif hasattr(fig.canvas, "print_png"):
+        orig_dpi = fig.dpi
+        fig.dpi = dpi
+        try:
+            fig.canvas.print_png(output_path, metadata={}, pil_kwargs=PNG_PIL_KWARGS)
+        finally:
+            fig.dpi = orig_dpi
+    else:
+        fig.savefig(output_path, dpi=dpi, pil_kwargs=PNG_PIL_KWARGS)
+
+
+# Figures kept alive between calls when a plot function is called with reuse_fig=True
+_FIG_CACHE = {}
+
+# Bump whenever a change to this module alters how plots look, so images
+# written by the previous code are re-rendered instead of being kept as unchanged.
+PLOT_STYLE_VERSION = 2
+
+
+def _plot_key(kind: str, problem: Problem, solution: Solution, output_path: str, dpi: int) -> str:
+    """Content hash of everything that determines the image of one plot function."""
+    ext = os.path.splitext(output_path)[1].lower()
+    salt = (PLOT_STYLE_VERSION, matplotlib.__version__)
+    return hashlib.sha1(repr((salt, kind, problem, solution, dpi, ext)).encode()).hexdigest()
+
+
+# Each written plot gets a small sidecar file in PLOT_HASH_DIR holding its _plot_key.
+# A later call whose key matches the sidecar (and the file still exists) returns
+# without rendering, across processes too; pass force=True to render anyway.
+# Sidecars live outside the output directory so they are never served with the plots.
+PLOT_HASH_DIR = os.environ.get("PLOT_HASH_DIR", os.path.join(tempfile.gettempdir(), "bap_plot_hashes"))
+
+
+def _hash_path(output_path: str) -> str:
+    """Sidecar file for output_path: one fixed name per absolute output path."""
+    name = hashlib.sha1(os.path.abspath(output_path).encode()).hexdigest()
+    return os.path.join(PLOT_HASH_DIR, name + ".hash")
+
+
+def _output_unchanged(output_path: str, key: str) -> bool:
+    """True if output_path was written from the same content key; drops a stale sidecar."""
+    sidecar = _hash_path(output_path)
+    try:
+        with open(sidecar) as f:
+            if f.read() == key and os.path.exists(output_path):
+                return True
+        os.remove(sidecar)  # output_path is about to be rewritten
+    except OSError:
+        pass
+    return False
+
+
+def _write_plot_hash(output_path: str, key: str):
+    os.makedirs(PLOT_HASH_DIR, exist_ok=True)
+    with open(_hash_path(output_path), "w") as f:
+        f.write(key)
+
+
+def _get_figure(key: str, figsize, reuse: bool, layout=None):
+    """Return a blank figure of the given size, recycling the cached one for key if reuse."""
+    if not reuse:
+        return plt.figure(figsize=figsize, layout=layout)
+    fig = _FIG_CACHE.get(key)
+    if fig is None:
+        fig = _FIG_CACHE[key] = plt.figure(figsize=figsize, layout=layout)
+    else:
+        fig.clf()
+        fig.set_size_inches(figsize)
+    return fig
+
+
+def _rect_verts(rects) -> np.ndarray:
+    """Corner vertices, shape (N, 4, 2), for a list of (x, y, width, height) rectangles."""
+    r = np.asarray(rects, dtype=float).reshape(-1, 4)
+    x0, y0 = r[:, 0], r[:, 1]
+    x1, y1 = x0 + r[:, 2], y0 + r[:, 3]
+    return np.stack([
+        np.column_stack([x0, y0]), np.column_stack([x1, y0]),
+        np.column_stack([x1, y1]), np.column_stack([x0, y1]),
+    ], axis=1)
+
+
+def _productivity_tables(cranes) -> dict:
+    """Moves per shift of every crane id, per productivity mode.
+
+    Built once per plot/print call, so edits to the cranes are always picked up.
+    INTERMEDIATE is the midpoint of min and max productivity.
+    """
+    return {
+        ProductivityMode.MAX: {c.id: c.max_productivity for c in cranes},
+        ProductivityMode.MIN: {c.id: c.min_productivity for c in cranes},
+        ProductivityMode.INTERMEDIATE: {c.id: (c.min_productivity + c.max_productivity) // 2 for c in cranes},
+    }
+
+
+def _eff_prod(tables: dict, pref) -> dict:
+    """The _productivity_tables entry for a vessel's preference (INTERMEDIATE if unknown)."""
+    return tables.get(pref, tables[ProductivityMode.INTERMEDIATE])
+
+
+def _dense_shift_moves(vs, table, num_shifts: int) -> np.ndarray:
+    """Moves of one vessel solution per shift, as an array indexed by shift."""
+    n = max([num_shifts, vs.end_shift] + [t + 1 for t in vs.assigned_cranes])
+    # One flat (shift, moves) entry per assignment, summed per shift
+    shifts = np.fromiter((t for t, c_list in vs.assigned_cranes.items() for _ in c_list), dtype=np.int64)
+    prods = np.fromiter((table.get(cid, 0) for c_list in vs.assigned_cranes.values() for cid in c_list),
+                        dtype=np.int64, count=len(shifts))
+    moves = np.zeros(n, dtype=np.int64)
+    np.add.at(moves, shifts, prods)
+    return moves
+
+
+def _cranes_used_per_shift(problem: Problem, solution: Solution) -> np.ndarray:
+    """Number of crane assignments in each shift, summed over all vessels."""
+    shift_ids = np.fromiter(
+        (t for vs in solution.vessel_solutions
+         for t, c_list in vs.assigned_cranes.items() for _ in c_list),
+        dtype=np.int64,
+    )
+    return np.bincount(shift_ids, minlength=problem.num_shifts)
+
+
+def plot_solution(problem: Problem, solution: Solution, output_path: str = "gantt.png",
+                  reuse_fig: bool = False, dpi: int = 150, force: bool = False):
     """Generate a Space-Time Gantt chart of the solution.
 
     X-axis: Shifts (time)
     Y-axis: Berth position (meters)
     Each vessel is drawn as a rectangle (position x time) with crane info.
+    With reuse_fig=True the figure is cleared and reused on the next call
+    instead of being created and closed each time.
+    dpi sets the output resolution; dpi=72 has ~4x fewer pixels than the default
+    150 and encodes ~4x faster, handy as a draft setting while iterating.
+
+    If output_path already holds the plot of this problem and solution (see
+    PLOT_HASH_DIR) nothing is written; force=True always renders.
     """
     if not solution.vessel_solutions:
         print("No solution to plot.")
         return
 
+    key = _plot_key("gantt", problem, solution, output_path, dpi)
+    if not force and _output_unchanged(output_path, key):
+        print(f"Gantt chart unchanged, kept {output_path}")
+        return
+
     # Create a figure with two subplots: Main Gantt and Depth Profile
-    fig, (ax, ax_depth) = plt.subplots(
+    fig = _get_figure("gantt", (16, 8), reuse_fig)
+    ax, ax_depth = fig.subplots(
         1, 2, 
         sharey=True, 
-        figsize=(16, 8), 
         gridspec_kw={'width_ratios': [7, 1], 'wspace': 0.05}
     )
 
     vessels_by_name = {v.name: v for v in problem.vessels}
+    prod_tables = _productivity_tables(problem.cranes)
+    # One font for every vessel label, resolved once instead of per text
+    label_font = FontProperties(size=6, weight="bold")
+
+    # Zones or vessels lying entirely outside the axes are not drawn at all
+    def visible(x0, y0, x1, y1):
+        return x1 > 0 and x0 < problem.num_shifts and y1 > 0 and y0 < problem.berth.length
+
+    # Draw forbidden zones first, all in one collection
+    zones = [z for z in problem.forbidden_zones
+             if visible(z.start_shift, z.start_berth_position, z.end_shift, z.end_berth_position)]
+    zone_verts = _rect_verts(
+        [(z.start_shift, z.start_berth_position,
+          z.end_shift - z.start_shift, z.end_berth_position - z.start_berth_position)
+         for z in zones]
+    )
+    ax.add_collection(PolyCollection(
+        zone_verts, hatch='//', facecolors='red', alpha=0.2, edgecolors='darkred',
+    ))
 
-    # Draw forbidden zones first
-    added_forbidden_label = False
-    for z in problem.forbidden_zones:
+    for z in zones:
         width = z.end_shift - z.start_shift
         height = z.end_berth_position - z.start_berth_position
-        
-        # Only add label once for the legend
-        label = "Restricted Zone" if not added_forbidden_label else None
-        
-        rect = mpatches.Rectangle(
-            (z.start_shift, z.start_berth_position),
-            width, height,
-            hatch='//', facecolor='red', alpha=0.2, edgecolor='darkred',
-            label=label
-        )
-        ax.add_patch(rect)
-        
+
         # Add text description
         ax.text(
             z.start_shift + width/2, z.start_berth_position + height/2,
@@ -59,30 +238,23 @@ def plot_solution(problem: Problem, solution: Solution, output_path: str = "gant
             ha='center', va='center', color='darkred', 
             fontsize=8, fontweight='bold', clip_on=True
         )
-        
-        if label:
-            added_forbidden_label = True
 
     # Draw Yard Quay Zones (New)
     # These are static zones along the Y-axis (Berth Position), covering all time.
     # We'll draw them as subtle background blocks.
     yard_colors = ["#e0f7fa", "#e8f5e9", "#fff3e0", "#f3e5f5"] # Light cyan, green, orange, purple
-    for z_idx, yz in enumerate(problem.yard_quay_zones):
+    # Explicit rectangles across the entire time horizon, all in one collection
+    ax.add_collection(PolyCollection(
+        _rect_verts([(0, yz.start_dist, problem.num_shifts, yz.end_dist - yz.start_dist)
+                     for yz in problem.yard_quay_zones]),
+        facecolors=[yard_colors[z_idx % len(yard_colors)] for z_idx in range(len(problem.yard_quay_zones))],
+        alpha=0.3, edgecolors='none',
+        zorder=0 # Behind everything
+    ))
+    for yz in problem.yard_quay_zones:
         y_start = yz.start_dist
         y_height = yz.end_dist - yz.start_dist
-        
-        # Color cycle
-        color = yard_colors[z_idx % len(yard_colors)]
-        
-        # Draw explicit rectangle across the entire time horizon
-        rect = mpatches.Rectangle(
-            (0, y_start),
-            problem.num_shifts, y_height,
-            facecolor=color, alpha=0.3, edgecolor=None,
-            zorder=0 # Behind everything
-        )
-        ax.add_patch(rect)
-        
+
         # Add label on the far right or left
         ax.text(
             0.2, y_start + y_height/2,
@@ -92,8 +264,13 @@ def plot_solution(problem: Problem, solution: Solution, output_path: str = "gant
             zorder=1
         )
 
+    # Vessel rectangles are collected here and added as a single collection
+    vessel_rects = []
+    vessel_colors = []
     for idx, vs in enumerate(solution.vessel_solutions):
         vessel = vessels_by_name[vs.vessel_name]
+        if not visible(vs.start_shift, vs.berth_position, vs.end_shift, vs.berth_position + vessel.loa):
+            continue
         color = COLORS[idx % len(COLORS)]
 
         # Add a small visual margin to prevent overlap with grid lines
@@ -110,63 +287,41 @@ def plot_solution(problem: Problem, solution: Solution, output_path: str = "gant
             height = vessel.loa
             y = vs.berth_position
 
-        rect = mpatches.FancyBboxPatch(
-            (x, y), width, height,
-            boxstyle="round,pad=0.02", # Reduced pad slightly to be tighter
-            facecolor=color, edgecolor="black", linewidth=1.2, alpha=0.85,
-        )
-        ax.add_patch(rect)
+        vessel_rects.append((x, y, width, height))
+        vessel_colors.append(color)
 
         # Label with vessel name, crane count per shift, and productivity details
-        # We need crane_map to lookup productivity
-        crane_map = {c.id: c for c in problem.cranes}
         pref = vessel.productivity_preference
+        table = _eff_prod(prod_tables, pref)
         
         # Build detailed crane string
-        # Format per shift: "T0: 2(240)" -> 2 cranes, total 240 prod
-        crane_details = []
-        for t in range(vs.start_shift, vs.end_shift):
-            c_list = vs.assigned_cranes.get(t, [])
-            if not c_list:
-                continue
-                
-            total_prod = 0
-            for cid in c_list:
-                if cid in crane_map:
-                    c = crane_map[cid]
-                    if pref == "MAX":
-                        total_prod += c.max_productivity
-                    elif pref == "MIN":
-                        total_prod += c.min_productivity
-                    else:
-                        total_prod += (c.min_productivity + c.max_productivity) // 2
-            
-            # Compact format: "S{t}:{count}c" or just count
-            # Given space constraints, maybe just list count and average prod?
-            # Or just list of cranes per shift is too long.
-            # Let's show: "S3:2(230)"
-            crane_details.append(f"S{t}:{len(c_list)}({total_prod})")
-        
-        # Wrap crane details if too long
-        crane_str = "\n".join(crane_details)
+        # Format per shift: "S3:2(230)" -> 2 cranes, total 230 prod; one line per worked shift
+        crane_str = "\n".join(
+            f"S{t}:{len(c_list)}({sum(table.get(cid, 0) for cid in c_list)})"
+            for t, c_list in sorted(vs.assigned_cranes.items())
+            if c_list and vs.start_shift <= t < vs.end_shift
+        )
         
         label = f"{vs.vessel_name}\n{vessel.productivity_preference}\n{crane_str}"
         
-        ax.text(
+        # Only labels of bars reaching past the axes limits need clipping
+        outside = (x < 0 or x + width > problem.num_shifts
+                   or y < 0 or y + height > problem.berth.length)
+        ax.add_artist(Text(
             x + width / 2, y + height / 2, label,
-            ha="center", va="center", fontsize=6, fontweight="bold", color="white",
-            clip_on=True
-        )
+            ha="center", va="center", fontproperties=label_font, color="white",
+            clip_on=outside
+        ))
+
+    ax.add_collection(PolyCollection(
+        _rect_verts(vessel_rects), facecolors=vessel_colors,
+        edgecolors="black", linewidths=1.2, alpha=0.85,
+        rasterized=len(vessel_rects) >= RASTERIZE_MIN_PATCHES,
+    ))
 
     # Axis configuration
     # Calculate total cranes used per shift
-    total_cranes_used_per_shift = {}
-    for t in range(problem.num_shifts):
-        used = 0
-        for vs in solution.vessel_solutions:
-            c_list = vs.assigned_cranes.get(t, [])
-            used += len(c_list)
-        total_cranes_used_per_shift[t] = used
+    total_cranes_used_per_shift = _cranes_used_per_shift(problem, solution)
 
     # X-axis configuration with crane usage labels
     ax.set_xlim(0, problem.num_shifts)
@@ -181,53 +336,46 @@ def plot_solution(problem: Problem, solution: Solution, output_path: str = "gant
 
     # Custom X-ticks labels showing shift index and crane usage
     ax.set_xticks(range(problem.num_shifts))
-    xtick_labels = []
-    for t in range(problem.num_shifts):
-        used = total_cranes_used_per_shift[t]
-        # Total available cranes for this shift
-        available = len(problem.crane_availability_per_shift.get(t, []))
-        
-        # Get shift label
-        shift_label = str(problem.shifts[t]) if t < len(problem.shifts) else str(t)
-        
-        xtick_labels.append(f"{shift_label}\n({used}/{available})")
+    # Tick label per shift: date plus used / total available cranes
+    shift_strs = [str(s) for s in problem.shifts]
+    avail_counts = [len(problem.crane_availability_per_shift.get(t, [])) for t in range(problem.num_shifts)]
+    used_counts = total_cranes_used_per_shift.tolist()
+    xtick_labels = [
+        f"{shift_strs[t] if t < len(shift_strs) else t}\n({used_counts[t]}/{avail_counts[t]})"
+        for t in range(problem.num_shifts)
+    ]
     
     ax.set_xticklabels(xtick_labels, fontsize=7, rotation=45)
     ax.grid(True, alpha=0.3)
     ax.set_axisbelow(True)
 
-    # Legend
-    legend_patches = [
-        mpatches.Patch(color=COLORS[i % len(COLORS)], label=vs.vessel_name)
-        for i, vs in enumerate(solution.vessel_solutions)
-    ]
-    ax.legend(handles=legend_patches, loc="upper right", fontsize=8)
+    # Legend: lightweight square markers; busy plots rely on the in-rectangle labels instead
+    labels = [vs.vessel_name for vs in solution.vessel_solutions]
+    if len(labels) <= LEGEND_MAX_VESSELS:
+        handles = [
+            Line2D([0], [0], marker="s", markersize=8, linestyle="", color=COLORS[i % len(COLORS)])
+            for i in range(len(labels))
+        ]
+        ax.legend(handles, labels, loc="upper right", fontsize=8, ncol=max(1, len(labels) // 15))
 
     # --- Depth Profile Subplot ---
     # Draw the berth depth profile on the right subplot
-    positions = range(0, problem.berth.length + 1, 5) # Sample every 5m for smoothness
-    depths = []
-    max_finite_depth = 0
-    
-    # Pre-calculate max finite depth to handle infinity
-    for p in positions:
-        d = problem.berth.get_depth_at(p)
-        if d != float('inf'):
-            max_finite_depth = max(max_finite_depth, d)
-            
-    # Default if everything is infinity
-    if max_finite_depth == 0:
-        max_finite_depth = 20.0 
-
-    for p in positions:
-        d = problem.berth.get_depth_at(p)
-        if d == float('inf'):
-            depths.append(max_finite_depth * 1.2) # Show as slightly larger than max
-        else:
-            depths.append(d)
-
-    ax_depth.plot(depths, positions, color='tab:blue', linewidth=2)
-    ax_depth.fill_betweenx(positions, 0, depths, facecolor='tab:blue', alpha=0.3)
+    positions = np.arange(0, problem.berth.length + 1, 5) # Sample every 5m for smoothness
+    depths = problem.berth.get_depths(positions)
+
+    # Infinite depth (no limit) is shown as slightly larger than the max finite depth
+    finite = depths[np.isfinite(depths)]
+    max_finite_depth = finite.max() if finite.size and finite.max() > 0 else 20.0
+    depths = np.where(np.isinf(depths), max_finite_depth * 1.2, depths)
+
+    # Profile line and fill as one polygon, closed back along the x=0 axis
+    verts = np.column_stack([
+        np.concatenate([depths, [0, 0]]),
+        np.concatenate([positions, [positions[-1], positions[0]]]),
+    ])
+    ax_depth.add_patch(mpatches.Polygon(
+        verts, facecolor=mcolors.to_rgba('tab:blue', 0.3), edgecolor='tab:blue', linewidth=2
+    ))
     
     ax_depth.set_xlabel("Depth (m)")
     ax_depth.set_title("Berth Depth")
@@ -236,33 +384,46 @@ def plot_solution(problem: Problem, solution: Solution, output_path: str = "gant
     # Set x-limit for depth
     ax_depth.set_xlim(0, max_finite_depth * 1.25)
 
-    plt.tight_layout()
-    plt.savefig(output_path, dpi=150)
+    # Fixed margins instead of tight_layout(): the layout is fully determined by
+    # figsize and width_ratios, so there is no need for an extra measuring draw.
+    fig.subplots_adjust(left=0.06, right=0.98, top=0.93, bottom=0.18, wspace=0.05)
+    _savefig(fig, output_path, dpi)
+    _write_plot_hash(output_path, key)
     print(f"Gantt chart saved to {output_path}")
-    plt.close()
+    if not reuse_fig:
+        plt.close(fig)
 
 
-def plot_crane_schedule(problem: Problem, solution: Solution, output_path: str = "gantt_cranes.png"):
+def plot_crane_schedule(problem: Problem, solution: Solution, output_path: str = "gantt_cranes.png",
+                        reuse_fig: bool = False, dpi: int = 150, force: bool = False):
     """Generate a Gantt chart showing crane usage per shift.
     
     Y-axis: Cranes
     X-axis: Shifts
     Cells: Colored by Vessel, Text = Productivity
+    reuse_fig: keep the figure and recycle it on the next call (see plot_solution).
+    dpi: output resolution (see plot_solution).
+    force: render even if output_path already holds this plot (see PLOT_HASH_DIR).
     """
     if not solution.vessel_solutions:
         print("No solution to plot crane schedule.")
         return
 
+    key = _plot_key("cranes", problem, solution, output_path, dpi)
+    if not force and _output_unchanged(output_path, key):
+        print(f"Crane schedule unchanged, kept {output_path}")
+        return
+
     # Prepare data: Crane -> Shift -> List of (VesselName, Productivity)
     crane_schedule = {c.id: defaultdict(list) for c in problem.cranes} # Value is list now
     vessel_colors = {v.name: COLORS[i % len(COLORS)] for i, v in enumerate(problem.vessels)}
     
-    crane_map = {c.id: c for c in problem.cranes}
     vessels_map = {v.name: v for v in problem.vessels}
+    prod_tables = _productivity_tables(problem.cranes)
 
     for vs in solution.vessel_solutions:
         vessel = vessels_map[vs.vessel_name]
-        pref = vessel.productivity_preference
+        table = _eff_prod(prod_tables, vessel.productivity_preference)
         
         for t, crane_ids in vs.assigned_cranes.items():
             for cid in crane_ids:
@@ -270,23 +431,26 @@ def plot_crane_schedule(problem: Problem, solution: Solution, output_path: str =
                     # Calculate productivity for this specific assignment
                     # Note: If shifting gang (multiple per shift), productivity is applied fractionally in reality
                     # But for visual, we show nominal rate or maybe "Shared".
-                    c = crane_map[cid]
-                    prod = 0
-                    if pref == "MAX":
-                        prod = c.max_productivity
-                    elif pref == "MIN":
-                        prod = c.min_productivity
-                    else:
-                        prod = (c.min_productivity + c.max_productivity) // 2
-                        
+                    prod = table[cid]
                     crane_schedule[cid][t].append((vs.vessel_name, prod))
 
     # Plotting
-    fig, ax = plt.subplots(figsize=(14, len(problem.cranes) * 0.6 + 2))
+    fig = _get_figure("cranes", (14, len(problem.cranes) * 0.6 + 2), reuse_fig, layout="constrained")
+    ax = fig.subplots()
     
     cranes_sorted = sorted(problem.cranes, key=lambda c: c.id)
     y_labels = [c.id for c in cranes_sorted]
-    
+    vessel_names = list(vessel_colors)
+    vessel_index = {name: k for k, name in enumerate(vessel_names)}
+
+    # Cell state grid: 0 = idle, 1 = maintenance, 2 + k = whole cell worked for vessel k.
+    # Shifting-gang cells (several vessels in one shift) stay 0 here and are drawn split below.
+    grid = np.zeros((len(cranes_sorted), problem.num_shifts), dtype=np.int16)
+    split = np.zeros(grid.shape, dtype=bool)
+    split_rects, split_colors = [], []
+    labels = []  # vessel labels: (x, y, text, fontsize, rotation)
+
+    avail_sets = {t: frozenset(ids) for t, ids in problem.crane_availability_per_shift.items()}
     for i, crane in enumerate(cranes_sorted):
         cid = crane.id
         schedule = crane_schedule.get(cid, {})
@@ -294,51 +458,68 @@ def plot_crane_schedule(problem: Problem, solution: Solution, output_path: str =
         # Scan all shifts
         for t in range(problem.num_shifts):
             # Maintenance check
-            available_list = problem.crane_availability_per_shift.get(t, [])
-            if cid not in available_list:
-                 rect = mpatches.Rectangle(
-                    (t, i), 1, 1,
-                    facecolor='gray', alpha=0.3, hatch='///', edgecolor='black'
-                )
-                 ax.add_patch(rect)
-                 ax.text(t + 0.5, i + 0.5, "Maint", 
-                        ha="center", va="center", fontsize=6, color='black', alpha=0.7)
-                 continue
+            if cid not in avail_sets.get(t, frozenset()):
+                grid[i, t] = 1
+                continue
 
             assignments = schedule.get(t, [])
-            if assignments:
+            if len(assignments) == 1:
+                v_name, prod = assignments[0]
+                grid[i, t] = 2 + vessel_index[v_name]
+                labels.append((t + 0.5, i + 0.5, f"{v_name}\n({prod})", 7, 0))
+            elif assignments:
                 # Handle Shifting Gang (Multiple assignments in one shift)
                 num_assigns = len(assignments)
                 width = 1.0 / num_assigns
+                split[i, t] = True
                 
                 for idx, (v_name, prod) in enumerate(assignments):
-                    color = vessel_colors.get(v_name, "blue")
-                    
                     # Offset x position
                     x_pos = t + (idx * width)
-                    
-                    rect = mpatches.Rectangle(
-                        (x_pos, i), width, 1,
-                        facecolor=color, alpha=0.8, edgecolor='black'
-                    )
-                    ax.add_patch(rect)
-                    
-                    # Label
-                    label_text = f"{v_name}\n({prod})"
-                    if num_assigns > 1:
-                        # Compact label for split cells
-                         label_text = f"{v_name}"
-                    
-                    ax.text(x_pos + width/2, i + 0.5, label_text, 
-                            ha="center", va="center", fontsize=7 if num_assigns==1 else 6, 
-                            fontweight='bold', color='white', rotation=90 if num_assigns>1 else 0)
-            else:
-                # Idle
-                rect = mpatches.Rectangle(
-                    (t, i), 1, 1,
-                    facecolor='white', alpha=0.1, edgecolor='lightgray'
-                )
-                ax.add_patch(rect)
+                    split_rects.append((x_pos, i, width, 1))
+                    split_colors.append(vessel_colors.get(v_name, "blue"))
+                    # Compact label for split cells
+                    labels.append((x_pos + width / 2, i + 0.5, v_name, 6, 90))
+
+    # One image for every whole cell; the lookup table holds each state's RGBA
+    lut = np.array(
+        [(1, 1, 1, 0.1), mcolors.to_rgba("gray", 0.3)]
+        + [mcolors.to_rgba(vessel_colors[name], 0.8) for name in vessel_names]
+    )
+    ax.imshow(
+        lut[grid], origin="lower", aspect="auto", interpolation="nearest",
+        extent=(0, problem.num_shifts, 0, len(cranes_sorted)),
+    )
+
+    # Cell borders: black around worked cells, faint gray around idle ones.
+    # Maintenance and split cells are outlined by their own overlays below.
+    bordered = (grid != 1) & ~split
+    rows, cols = np.nonzero(bordered)
+    ones = np.ones(len(rows))
+    cell_verts = _rect_verts(np.column_stack([cols, rows, ones, ones]))
+    ax.add_collection(PolyCollection(
+        cell_verts, facecolors="none", rasterized=len(cell_verts) >= RASTERIZE_MIN_PATCHES,
+        edgecolors=np.where(grid[bordered][:, None] == 0,
+                            mcolors.to_rgba_array("lightgray", 0.1), mcolors.to_rgba_array("black")),
+    ))
+    maint = np.argwhere(grid == 1)
+    ax.add_collection(PolyCollection(
+        _rect_verts([(t, i, 1, 1) for i, t in maint]),
+        facecolors="none", edgecolors="black", hatch="///", alpha=0.3,
+    ))
+    ax.add_collection(PolyCollection(
+        _rect_verts(split_rects), facecolors=split_colors, edgecolors="black", alpha=0.8,
+    ))
+
+    # Text artists are added directly with fonts resolved once per size
+    maint_font = FontProperties(size=6)
+    label_fonts = {size: FontProperties(size=size, weight="bold") for size in (6, 7)}
+    for i, t in maint:
+        ax.add_artist(Text(t + 0.5, i + 0.5, "Maint", ha="center", va="center",
+                           fontproperties=maint_font, color='black', alpha=0.7, clip_on=False))
+    for x, y, text, size, rotation in labels:
+        ax.add_artist(Text(x, y, text, ha="center", va="center", fontproperties=label_fonts[size],
+                           color='white', rotation=rotation, clip_on=False))
 
     ax.set_yticks([i + 0.5 for i in range(len(cranes_sorted))])
     ax.set_yticklabels(y_labels)
@@ -348,8 +529,9 @@ def plot_crane_schedule(problem: Problem, solution: Solution, output_path: str =
     # Update X-ticks to show Shift Dates
     ax.set_xticks([t + 0.5 for t in range(problem.num_shifts)])
     x_labels_cranes = []
+    shift_strs = [str(s) for s in problem.shifts]
     for t in range(problem.num_shifts):
-        shift_label = str(problem.shifts[t]) if t < len(problem.shifts) else str(t)
+        shift_label = shift_strs[t] if t < len(shift_strs) else str(t)
         x_labels_cranes.append(shift_label)
     ax.set_xticklabels(x_labels_cranes, rotation=45, fontsize=8)
 
@@ -361,50 +543,42 @@ def plot_crane_schedule(problem: Problem, solution: Solution, output_path: str =
     
     ax.grid(True, axis='x', linestyle='--', alpha=0.5)
     
-    plt.tight_layout()
-    plt.savefig(output_path, dpi=150)
+    _savefig(fig, output_path, dpi)
+    _write_plot_hash(output_path, key)
     print(f"Crane schedule saved to {output_path}")
-    plt.close()
+    if not reuse_fig:
+        plt.close(fig)
 
 
 def print_solution(problem: Problem, solution: Solution):
     """Print a text summary of the solution."""
-    print("=" * 70)
-    print(f"Solution Status: {solution.status}")
-    print(f"Objective Value: {solution.objective_value:.2f}")
-    print("=" * 70)
+    out = []  # written to stdout in one call at the end
+    out.append("=" * 70)
+    out.append(f"Solution Status: {solution.status}")
+    out.append(f"Objective Value: {solution.objective_value:.2f}")
+    out.append("=" * 70)
 
     if not solution.vessel_solutions:
-        print("No feasible solution found.")
+        out.append("No feasible solution found.")
+        sys.stdout.write("\n".join(out) + "\n")
         return
 
     vessels_by_name = {v.name: v for v in problem.vessels}
-    crane_map = {c.id: c for c in problem.cranes}
+    prod_tables = _productivity_tables(problem.cranes)
 
     for vs in solution.vessel_solutions:
         vessel = vessels_by_name[vs.vessel_name]
         
         # Calculate delivered capacity based on vessel preference
-        total_moves = 0
         pref = vessel.productivity_preference
+        table = _eff_prod(prod_tables, pref)
+        shift_moves = _dense_shift_moves(vs, table, problem.num_shifts)
+        total_moves = int(shift_moves.sum())
         
-        for t, crane_ids in vs.assigned_cranes.items():
-            for cid in crane_ids:
-                if cid in crane_map:
-                    c = crane_map[cid]
-                    prod = 0
-                    if pref == "MAX":
-                        prod = c.max_productivity
-                    elif pref == "MIN":
-                        prod = c.min_productivity
-                    else:
-                        prod = (c.min_productivity + c.max_productivity) // 2
-                    total_moves += prod
-        
-        print(f"\n--- {vs.vessel_name} ---")
-        print(f"  Berth position: {vs.berth_position}m - "
+        out.append(f"\n--- {vs.vessel_name} ---")
+        out.append(f"  Berth position: {vs.berth_position}m - "
               f"{vs.berth_position + vessel.loa}m")
-        print(f"  Time: shift {vs.start_shift} -> {vs.end_shift} "
+        out.append(f"  Time: shift {vs.start_shift} -> {vs.end_shift} "
               f"(duration: {vs.end_shift - vs.start_shift} shifts)")
         deadline = vessel.departure_deadline if vessel.departure_deadline else "Not Set (Auto)"
         
@@ -418,38 +592,24 @@ def print_solution(problem: Problem, solution: Solution):
             extra_shifts = vs.end_shift - len(problem.shifts)
             completion_dt = f"{problem.shifts[-1].end_time} (+{extra_shifts} shifts)"
 
-        print(f"  Arrival: {vessel.arrival_time}, Deadline: {deadline}")
-        print(f"  Calculated ETC: {completion_dt}")
-        print(f"  Internal: Shift {vessel.arrival_shift_index} (Fraction: {vessel.arrival_fraction:.2f})")
-        print(f"  Productivity Mode: {pref}")
-        print(f"  Workload: {vessel.workload} moves, "
+        out.append(f"  Arrival: {vessel.arrival_time}, Deadline: {deadline}")
+        out.append(f"  Calculated ETC: {completion_dt}")
+        out.append(f"  Internal: Shift {vessel.arrival_shift_index} (Fraction: {vessel.arrival_fraction:.2f})")
+        out.append(f"  Productivity Mode: {pref}")
+        out.append(f"  Workload: {vessel.workload} moves, "
               f"Capacity delivered: {total_moves} moves")
-        print(f"  Crane assignment per shift:")
+        out.append(f"  Crane assignment per shift:")
         for t in range(vs.start_shift, vs.end_shift):
             crane_ids = vs.assigned_cranes.get(t, [])
-            
-            # Calculate moves for this shift
-            moves_this_shift = 0
-            for cid in crane_ids:
-                if cid in crane_map:
-                    c = crane_map[cid]
-                    if pref == "MAX":
-                        moves_this_shift += c.max_productivity
-                    elif pref == "MIN":
-                        moves_this_shift += c.min_productivity
-                    else:
-                        moves_this_shift += (c.min_productivity + c.max_productivity) // 2
-            
-            print(f"    Shift {t}: {len(crane_ids)} cranes {crane_ids} "
-                  f"({moves_this_shift} moves)")
+            out.append(f"    Shift {t}: {len(crane_ids)} cranes {crane_ids} "
+                  f"({shift_moves[t]} moves)")
 
     # Global crane usage summary
-    print("\n" + "=" * 70)
-    print("Global Crane Usage per Shift:")
+    out.append("\n" + "=" * 70)
+    out.append("Global Crane Usage per Shift:")
+    used_per_shift = _cranes_used_per_shift(problem, solution)
     for t in range(problem.num_shifts):
-        used_count = 0
-        for vs in solution.vessel_solutions:
-            used_count += len(vs.assigned_cranes.get(t, []))
+        used_count = int(used_per_shift[t])
             
         available_count = len(problem.crane_availability_per_shift.get(t, []))
         
@@ -458,10 +618,13 @@ def print_solution(problem: Problem, solution: Solution):
         # Scale to max capacity?
         # Just use raw count for now
         bar = "#" * bar_len
-        print(f"  Shift {t}: {used_count}/{available_count} [{bar}]")
+        out.append(f"  Shift {t}: {used_count}/{available_count} [{bar}]")
+
+    sys.stdout.write("\n".join(out) + "\n")
 
 
-def plot_vessel_execution_gantt(problem: Problem, solution: Solution, output_path: str = "vessel_execution.png"):
+def plot_vessel_execution_gantt(problem: Problem, solution: Solution, output_path: str = "vessel_execution.png",
+                                dpi: int = 150, force: bool = False):
     """
     Generate a Gantt chart focused on Vessel execution details.
     
@@ -470,22 +633,28 @@ def plot_vessel_execution_gantt(problem: Problem, solution: Solution, output_pat
     Bar Content: Moves performed in that shift by which cranes.
     Annotations: Remaining workload after shift.
     Final Marker: Completion time (ETC).
+    dpi: output resolution (see plot_solution).
+    force: render even if output_path already holds this plot (see PLOT_HASH_DIR).
     """
     if not solution.vessel_solutions:
         print("No solution to plot.")
         return
 
+    key = _plot_key("execution", problem, solution, output_path, dpi)
+    if not force and _output_unchanged(output_path, key):
+        print(f"Vessel Execution Gantt unchanged, kept {output_path}")
+        return
+
     # Sort vessels by arrival time (or start shift) for cleaner Gantt
     sorted_solutions = sorted(solution.vessel_solutions, key=lambda x: x.start_shift)
-    vessels = [v for v in problem.vessels]
-    v_map = {v.name: v for v in vessels}
-    c_map = {c.id: c for c in problem.cranes}
+    v_map = {v.name: v for v in problem.vessels}
+    prod_tables = _productivity_tables(problem.cranes)
 
-    fig, ax = plt.subplots(figsize=(16, len(sorted_solutions) * 1.5 + 2))
+    fig, ax = plt.subplots(figsize=(16, len(sorted_solutions) * 1.5 + 2), layout="constrained")
     
-    # Define colors
-    import matplotlib.cm as cm
-    colors = cm.get_cmap('tab20', len(sorted_solutions))
+    # Define colors: one RGBA per vessel, resolved once
+    # (evenly spaced samples, as get_cmap('tab20', N) gave; works on matplotlib 3.5)
+    vessel_rgba = [tuple(rgba) for rgba in colormaps['tab20'](np.linspace(0, 1, len(sorted_solutions)))]
     
     y_labels = []
     y_ticks = []
@@ -495,6 +664,7 @@ def plot_vessel_execution_gantt(problem: Problem, solution: Solution, output_pat
 
     for idx, sol in enumerate(sorted_solutions):
         v = v_map[sol.vessel_name]
+        table = _eff_prod(prod_tables, v.productivity_preference)
         y_pos = idx
         y_labels.append(f"{v.name}\n(Tot: {v.workload})")
         y_ticks.append(y_pos)
@@ -515,8 +685,9 @@ def plot_vessel_execution_gantt(problem: Problem, solution: Solution, output_pat
         max_active_shift = max(max_active_shift, sol.end_shift)
 
         # Draw arrival marker
-        ax.plot(v.arrival_shift_index + v.arrival_fraction, y_pos, 'g>', markersize=10, label='Arrival' if idx==0 else "")
+        ax.plot(v.arrival_shift_index + v.arrival_fraction, y_pos, 'g>', markersize=10)
 
+        xranges = []  # (start, width) of every shift bar, drawn as one collection
         for seq_idx, t in enumerate(executed_shifts):
             cranes = sol.assigned_cranes[t]
             if not cranes: continue
@@ -525,13 +696,8 @@ def plot_vessel_execution_gantt(problem: Problem, solution: Solution, output_pat
             crane_details = []
             
             for c_id in cranes:
-                if c_id not in c_map: continue
-                c = c_map[c_id]
-                
-                # Determine limit
-                limit = c.max_productivity
-                if v.productivity_preference.name == "MIN": limit = c.min_productivity
-                elif v.productivity_preference.name == "INTERMEDIATE": limit = (c.min_productivity + c.max_productivity) // 2
+                if c_id not in table: continue
+                limit = table[c_id]
                 
                 # Arrival fraction impact
                 if t == v.arrival_shift_index:
@@ -576,34 +742,20 @@ def plot_vessel_execution_gantt(problem: Problem, solution: Solution, output_pat
             # We don't know exact finish time within shift without better solver output.
             # Assuming full shift used for visualization unless very small moves.
             
-            ax.barh(
-                y_pos, width=bar_width, left=bar_start, height=0.6,
-                color=colors(idx), edgecolor='black', alpha=0.8
-            )
-            
-            # Annotate Moves (Center)
-            ax.text(
-                bar_start + bar_width/2, y_pos, 
-                f"{int(shift_moves)}", 
-                ha='center', va='center', fontsize=9, color='white', fontweight='bold'
-            )
+            xranges.append((bar_start, bar_width))
             
-            # Annotate Remain (Bottom Right)
-            ax.text(
-                bar_start + bar_width, y_pos - 0.35, 
-                f"Rem:{int(remain)}", 
-                ha='right', va='top', fontsize=8, color='black', fontweight='bold'
-            )
-            
-            # Annotate Cranes (Top)
+            # One annotation per bar: cranes, moves in the shift, remaining workload
             # Shorten names? C1, C2...
             c_str = ",".join([cid.split('-')[-1] for cid in cranes])
             ax.text(
-                 bar_start + bar_width/2, y_pos + 0.32, 
-                 f"[{c_str}]", 
-                 ha='center', va='bottom', fontsize=7, color='blue'
+                bar_start + bar_width/2, y_pos,
+                f"[{c_str}]\n{int(shift_moves)}\nRem:{int(remain)}",
+                ha='center', va='center', fontsize=7, color='white', fontweight='bold'
             )
 
+        bars = ax.broken_barh(xranges, (y_pos - 0.3, 0.6), facecolors=vessel_rgba[idx], edgecolor='black', alpha=0.8)
+        bars.sticky_edges.x.extend(start for start, _ in xranges)  # autoscale like barh: no margin left of a bar
+
         # Mark ETC / Completion
         completion_time = sol.end_shift 
         # Draw finish line
@@ -624,7 +776,6 @@ def plot_vessel_execution_gantt(problem: Problem, solution: Solution, output_pat
     # Add legend manually?
     # Legend for bar colors is vessel - redundant names are on Y axis.
     # Arrival/Departure markers legend
-    from matplotlib.lines import Line2D
     legend_elements = [
         Line2D([0], [0], marker='>', color='w', markerfacecolor='g', label='Arrival', markersize=10),
         Line2D([0], [0], color='r', lw=2, label='Completion'),
@@ -632,7 +783,7 @@ def plot_vessel_execution_gantt(problem: Problem, solution: Solution, output_pat
     ]
     ax.legend(handles=legend_elements, loc='upper right')
     
-    plt.tight_layout()
-    plt.savefig(output_path, dpi=150)
+    _savefig(fig, output_path, dpi)
+    _write_plot_hash(output_path, key)
     print(f"Vessel Execution Gantt saved to {output_path}")
-    plt.close()
+    plt.close(fig)